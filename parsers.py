@@ -1,6 +1,6 @@
 # parsers.py
 import io, re, unicodedata
-from typing import Dict, Tuple, List, Set
+from typing import Dict, Tuple, List, Set, Optional
 
 # --- Excepción para soporte PDF opcional ---
 class PDFSupportMissing(Exception):
@@ -36,8 +36,9 @@ def _unique_titles(matches: List[str]) -> Set[str]:
     return set(cleaned)
 
 # --- Extracción de texto ---
-def extract_text(file_bytes: bytes, filename: str) -> str:
-    name = filename.lower()
+def extract_text(file_bytes: bytes, filename: str, kind: Optional[str] = None) -> str:
+    # kind viene de preflight.preflight (formato por contenido); si no, por extensión
+    name = f".{kind}" if kind else filename.lower()
     if name.endswith(".pdf"):
         try:
             import pdfplumber  # lazy import
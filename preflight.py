@@ -0,0 +1,361 @@
+# preflight.py
+# Etapa de admisión previa al parseo: decide en milisegundos si un archivo
+# vale la pena pasarlo por pdfplumber / python-docx, y con qué parser.
+import io, re, zlib, zipfile
+import xml.etree.ElementTree as ET
+from bisect import bisect_left, bisect_right
+from itertools import islice
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Set
+
+# ---------------------------------------------------------------------
+# Presupuestos (configurables por quien llama)
+# ---------------------------------------------------------------------
+@dataclass
+class PreflightLimits:
+    max_bytes: int = 20 * 1024 * 1024           # tamaño máximo del archivo subido
+    max_pages: Optional[int] = None             # tope duro de páginas de un PDF (None = sin tope)
+    warn_pages: int = 200                       # a partir de acá sólo se avisa que puede demorar
+    max_unzipped_bytes: int = 100 * 1024 * 1024 # contenido descomprimido de un .docx
+    max_pdf_objstm_bytes: int = 4 * 1024 * 1024 # object streams de un PDF a inflar para inspección
+
+DEFAULT_LIMITS = PreflightLimits()
+
+# ---------------------------------------------------------------------
+# Resultado estructurado (lo reportan la UI y cualquier proceso por lotes)
+# ---------------------------------------------------------------------
+@dataclass
+class PreflightIssue:
+    code: str
+    message: str
+
+@dataclass
+class PreflightResult:
+    filename: str
+    kind: Optional[str] = None            # "pdf" | "docx" | "txt" | None si se rechaza
+    size: int = 0
+    pages: Optional[int] = None
+    has_text_layer: Optional[bool] = None
+    issues: List[PreflightIssue] = field(default_factory=list)   # motivos de rechazo
+    warnings: List[PreflightIssue] = field(default_factory=list) # avisos (no bloquean)
+
+    @property
+    def ok(self) -> bool:
+        return not self.issues
+
+    def reject(self, code: str, message: str) -> "PreflightResult":
+        self.issues.append(PreflightIssue(code, message))
+        self.kind = None
+        return self
+
+    def warn(self, code: str, message: str) -> None:
+        self.warnings.append(PreflightIssue(code, message))
+
+    def as_dict(self) -> Dict:
+        return {
+            "archivo": self.filename,
+            "ok": self.ok,
+            "tipo": self.kind,
+            "bytes": self.size,
+            "paginas": self.pages,
+            "capa_de_texto": self.has_text_layer,
+            "motivos": [i.__dict__ for i in self.issues],
+            "avisos": [w.__dict__ for w in self.warnings],
+        }
+
+# ---------------------------------------------------------------------
+# Firmas (magic bytes)
+# ---------------------------------------------------------------------
+_PDF_MAGIC = b"%PDF-"
+_ZIP_MAGIC = b"PK\x03\x04"
+_OLE2_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"   # .doc / .xls / OOXML cifrado
+_OLE2_ENCRYPTED = "EncryptionInfo".encode("utf-16-le")
+
+def _extension(filename: str) -> str:
+    name = filename.lower()
+    return name.rsplit(".", 1)[-1] if "." in name else ""
+
+# --- PDF: lectura superficial del xref/trailer y de los object streams ---
+# Todos los patrones son lineales: nada de [^>]*? entre dos tokens (backtracking cuadrático).
+_RE_ENCRYPT = re.compile(rb"/Encrypt\s*(?:\d+\s+\d+\s+R|<<)")
+_RE_PAGES_TYPE = re.compile(rb"/Type\s*/Pages\b")
+_RE_COUNT = re.compile(rb"/Count\s+(\d{1,9})")
+_RE_DICT_BOUNDARY = re.compile(rb"\bendobj\b|\bobj\b|/Type\b")
+_RE_PAGE = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+_RE_FONT = re.compile(rb"/Font\b")
+_RE_OBJSTM = re.compile(rb"/Type\s*/ObjStm\b")
+_RE_OBJSTM_N = re.compile(rb"/N\s+(\d{1,7})")
+_RE_OBJSTM_FIRST = re.compile(rb"/First\s+(\d{1,9})")
+_PAGES_WINDOW = 8192      # distancia máxima entre /Type /Pages y su /Count
+_MAX_PAGES_NODES = 20000  # más nodos /Pages que esto no es un CV: páginas desconocidas
+
+def _objstm_offsets(chunk: bytes, header: bytes) -> List[int]:
+    """Inicio de cada objeto dentro de un /ObjStm ya descomprimido, según los
+    pares (número, offset) del encabezado. Lista vacía si no se puede leer."""
+    n, first = _RE_OBJSTM_N.search(header), _RE_OBJSTM_FIRST.search(header)
+    if not n or not first:
+        return []
+    n, first = int(n.group(1)), int(first.group(1))
+    nums = chunk[:first].split()
+    if len(nums) < 2 * n or not all(x.isdigit() for x in nums[:2 * n]):
+        return []
+    return sorted(first + int(x) for x in nums[1:2 * n:2])
+
+def _pdf_object_streams(data: bytes, budget: int):
+    """Descomprime los /ObjStm (FlateDecode) donde los PDF modernos esconden
+    páginas y recursos. Devuelve ([(bloque, inicios_de_objeto)], hubo_fallos)."""
+    chunks, failed, pos = [], False, 0
+    while True:
+        m = _RE_OBJSTM.search(data, pos)
+        if not m:
+            break
+        s = data.find(b"stream", m.end())
+        if s < 0:
+            break
+        s += len(b"stream")
+        if data[s:s + 2] == b"\r\n":
+            s += 2
+        elif data[s:s + 1] in (b"\n", b"\r"):
+            s += 1
+        e = data.find(b"endstream", s)
+        if e < 0:
+            failed = True
+            break
+        pos = e   # cada byte se recorre una sola vez, aunque haya /ObjStm sueltos
+        if budget <= 0:   # zlib toma max_length=0 como "sin límite"
+            failed = True
+            break
+        inflater = zlib.decompressobj()
+        try:
+            chunk = inflater.decompress(data[s:e], budget)
+        except zlib.error:
+            failed = True
+            continue
+        budget -= len(chunk)
+        if inflater.unconsumed_tail:   # cortado por el presupuesto: inspección incompleta
+            failed = True
+        # diccionario del stream (acotado): de su "obj" hasta la palabra stream
+        d = data.rfind(b"obj", max(m.start() - 1024, 0), m.start())
+        header = data[d if d >= 0 else max(m.start() - 1024, 0):min(s, m.end() + 1024)]
+        chunks.append((chunk, _objstm_offsets(chunk, header)))
+    return chunks, failed
+
+def _pdf_page_count(blob: bytes, cuts: Sequence[int] = ()) -> Optional[int]:
+    """Mayor /Count de un diccionario /Type /Pages (la raíz del árbol). Empareja
+    cada /Count con el /Type /Pages más cercano del mismo objeto; `cuts` son los
+    inicios de objeto de un /ObjStm, donde no hay obj/endobj que los separe."""
+    types = [m.start() for m in islice(_RE_PAGES_TYPE.finditer(blob), _MAX_PAGES_NODES + 1)]
+    if not types or len(types) > _MAX_PAGES_NODES:
+        return None
+
+    # Límite del objeto a cada lado de cada /Type /Pages (obj/endobj u otro /Type).
+    # Los rangos buscados no se solapan (el /Type vecino ya es un límite): costo lineal.
+    before: Dict[int, int] = {}
+    after: Dict[int, int] = {}
+
+    def bound_before(k: int) -> int:
+        if k not in before:
+            t = types[k]
+            floor = types[k - 1] if k else -1
+            last = floor
+            for b in _RE_DICT_BOUNDARY.finditer(blob, max(t - _PAGES_WINDOW, floor + 1), t):
+                last = b.start()
+            before[k] = last
+        return before[k]
+
+    def bound_after(k: int) -> int:
+        if k not in after:
+            t = types[k]
+            ceil = types[k + 1] if k + 1 < len(types) else len(blob)
+            b = _RE_DICT_BOUNDARY.search(blob, t + 1, min(t + _PAGES_WINDOW, ceil))
+            after[k] = b.start() if b else ceil
+        return after[k]
+
+    best = None
+    for m in islice(_RE_COUNT.finditer(blob), _MAX_PAGES_NODES):
+        c = m.start()
+        i = bisect_left(types, c)
+        for k in (i - 1, i):
+            if not 0 <= k < len(types) or abs(types[k] - c) > _PAGES_WINDOW:
+                continue
+            # mismo objeto: ningún obj/endobj ni otro /Type entre ambos
+            if (c > types[k] and bound_after(k) < c) or (c < types[k] and bound_before(k) > c):
+                continue
+            lo, hi = min(c, types[k]), max(c, types[k])
+            j = bisect_right(cuts, lo)
+            if j < len(cuts) and cuts[j] <= hi:
+                continue
+            n = int(m.group(1))
+            best = n if best is None else max(best, n)
+            break
+    return best
+
+def _pdf_opens_without_password(data: bytes) -> Optional[bool]:
+    """True si pdfminer abre el PDF cifrado con contraseña vacía (sólo tiene
+    contraseña de propietario), False si pide contraseña, None si no se sabe."""
+    try:
+        from pdfminer.pdfparser import PDFParser  # lazy import
+        from pdfminer.pdfdocument import PDFDocument, PDFPasswordIncorrect
+    except Exception:
+        return None
+    try:
+        PDFDocument(PDFParser(io.BytesIO(data)), password="")
+    except PDFPasswordIncorrect:
+        return False
+    except Exception:
+        return None
+    return True
+
+def _sniff_pdf(data: bytes, res: PreflightResult, limits: PreflightLimits) -> PreflightResult:
+    res.kind = "pdf"
+    if _RE_ENCRYPT.search(data):
+        opens = _pdf_opens_without_password(data)
+        if opens is False:
+            return res.reject("pdf_cifrado", "El PDF está protegido con contraseña de apertura.")
+        if opens is True:
+            res.warn("pdf_restringido", "El PDF tiene restricciones de propietario; se intenta leer igual.")
+        else:
+            res.warn("pdf_cifrado_incierto", "El PDF está cifrado; se intenta leer con contraseña vacía.")
+
+    chunks, uncertain = _pdf_object_streams(data, limits.max_pdf_objstm_bytes)
+    blobs = [data] + [chunk for chunk, _ in chunks]
+
+    # Páginas: /Count del árbol /Pages (el mayor es la raíz); si no hay, contamos /Page
+    counts = [_pdf_page_count(data)] + [_pdf_page_count(chunk, cuts) for chunk, cuts in chunks]
+    counts = [n for n in counts if n is not None]
+    if counts:
+        res.pages = max(counts)
+    else:
+        n = sum(len(_RE_PAGE.findall(blob)) for blob in blobs)
+        res.pages = n or None
+
+    if res.pages is None:
+        res.warn("pdf_paginas_desconocidas", "No se pudo determinar la cantidad de páginas.")
+    elif limits.max_pages is not None and res.pages > limits.max_pages:
+        return res.reject(
+            "demasiadas_paginas",
+            f"El PDF tiene {res.pages} páginas (máximo permitido: {limits.max_pages}).")
+    elif res.pages > limits.warn_pages:
+        res.warn(
+            "muchas_paginas",
+            f"El PDF tiene {res.pages} páginas; la lectura puede demorar.")
+
+    # Capa de texto: sin ninguna /Font no hay nada que extraer (PDF escaneado)
+    res.has_text_layer = any(_RE_FONT.search(blob) for blob in blobs)
+    if not res.has_text_layer:
+        if uncertain:
+            res.has_text_layer = None
+            res.warn("pdf_texto_incierto", "No se pudo confirmar si el PDF tiene capa de texto.")
+        else:
+            return res.reject(
+                "pdf_sin_texto",
+                "El PDF no tiene capa de texto (parece escaneado). Subí una versión con OCR o en .docx.")
+    return res
+
+# --- DOCX: la parte principal se busca por [Content_Types].xml o _rels/.rels ---
+_WORD_MAIN_TYPES = {
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.template.main+xml",
+    "application/vnd.ms-word.document.macroEnabled.main+xml",
+    "application/vnd.ms-word.template.macroEnabledTemplate.main+xml",
+}
+_OTHER_MAIN_TYPES = {
+    "spreadsheetml": "El archivo es una planilla de Excel, no un CV en Word.",
+    "presentationml": "El archivo es una presentación de PowerPoint, no un CV en Word.",
+}
+_MAX_PACKAGE_XML = 1024 * 1024   # [Content_Types].xml / .rels razonables
+
+def _zip_xml(zf: zipfile.ZipFile, name: str):
+    try:
+        info = zf.getinfo(name)
+        if info.file_size > _MAX_PACKAGE_XML:
+            return None
+        return ET.fromstring(zf.read(info))
+    except (KeyError, ET.ParseError):
+        return None
+
+def _docx_main_part(zf: zipfile.ZipFile, names: Set[str]):
+    """Devuelve (parte_principal, motivo_si_no_es_word)."""
+    ct = _zip_xml(zf, "[Content_Types].xml")
+    if ct is not None:
+        for el in ct:
+            if not el.tag.endswith("Override"):
+                continue
+            ctype, part = el.get("ContentType", ""), el.get("PartName", "").lstrip("/")
+            if ctype in _WORD_MAIN_TYPES and part in names:
+                return part, None
+            for key, msg in _OTHER_MAIN_TYPES.items():
+                if key in ctype and ctype.endswith(".main+xml"):
+                    return None, msg
+    rels = _zip_xml(zf, "_rels/.rels")
+    if rels is not None:
+        for el in rels:
+            if el.get("Type", "").endswith("/officeDocument"):
+                target = el.get("Target", "").lstrip("/")
+                if target in names:
+                    return target, None
+    return None, "El ZIP no contiene un documento de Word (.docx)."
+
+def _sniff_zip(data: bytes, res: PreflightResult, limits: PreflightLimits) -> PreflightResult:
+    try:
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            infos = zf.infolist()   # sólo lee el directorio central
+            names = {i.filename for i in infos}
+            main, not_word = _docx_main_part(zf, names)
+    except (zipfile.BadZipFile, ValueError, NotImplementedError, UnicodeDecodeError,
+            EOFError, zlib.error, RuntimeError):
+        # ZIP corrupto en el directorio central o en un miembro (RuntimeError: miembro cifrado)
+        return res.reject("zip_danado", "El archivo parece un .docx pero el ZIP está dañado.")
+
+    if main is None:
+        return res.reject("formato_no_soportado", not_word)
+
+    unzipped = sum(i.file_size for i in infos)
+    if unzipped > limits.max_unzipped_bytes:
+        return res.reject(
+            "docx_demasiado_grande",
+            f"El .docx descomprimido ocupa {unzipped} bytes (máximo: {limits.max_unzipped_bytes}).")
+    res.kind = "docx"
+    return res
+
+def _sniff_ole2(data: bytes, res: PreflightResult) -> PreflightResult:
+    if _OLE2_ENCRYPTED in data[:64 * 1024]:
+        return res.reject("docx_cifrado", "El documento de Word está protegido con contraseña.")
+    return res.reject(
+        "doc_legacy",
+        "El archivo es un .doc (Word 97-2003), que no está soportado. Convertilo a .docx o PDF.")
+
+# ---------------------------------------------------------------------
+# API
+# ---------------------------------------------------------------------
+def preflight(file_bytes: bytes, filename: str, limits: Optional[PreflightLimits] = None) -> PreflightResult:
+    """Identifica el formato real por contenido (no por extensión) y aplica los
+    presupuestos de tamaño/páginas antes de cualquier parseo costoso."""
+    limits = limits or DEFAULT_LIMITS
+    res = PreflightResult(filename=filename, size=len(file_bytes))
+
+    if not file_bytes:
+        return res.reject("vacio", "El archivo está vacío.")
+    if res.size > limits.max_bytes:
+        return res.reject(
+            "demasiado_grande",
+            f"El archivo pesa {res.size} bytes (máximo permitido: {limits.max_bytes}).")
+
+    head = file_bytes[:1024]
+    if _PDF_MAGIC in head:
+        _sniff_pdf(file_bytes, res, limits)
+    elif head.startswith(_ZIP_MAGIC):
+        _sniff_zip(file_bytes, res, limits)
+    elif head.startswith(_OLE2_MAGIC):
+        _sniff_ole2(file_bytes, res)
+    elif b"\x00" in file_bytes[:4096]:
+        res.reject("formato_desconocido", "No se reconoce el formato del archivo (contenido binario).")
+    else:
+        res.kind = "txt"
+
+    ext = _extension(filename)
+    if res.ok and ext != res.kind:
+        res.warn(
+            "extension_incorrecta",
+            f"La extensión .{ext or '?'} no coincide con el contenido; se lee como {res.kind.upper()}.")
+    return res
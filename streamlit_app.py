@@ -4,6 +4,7 @@ import pandas as pd
 # Módulos del proyecto
 from scoring import RULES, SECTION_LIMITS, sum_with_section_caps
 from parsers import extract_text, detect_counts, PDFSupportMissing
+from preflight import preflight
 from report import build_docx_report  # si no lo usás, podés comentar estas 2 líneas
 
 # ---------------------------------------------------------------------
@@ -84,12 +85,20 @@ try:
     file_bytes = bytes(uploaded.getbuffer())
     filename = uploaded.name
 
-    # NUEVO: el parser espera (bytes, filename) y devuelve texto normalizado
-    text = extract_text(file_bytes, filename)
-
-    # Deducimos el “kind” solo para mostrar
-    ext = (filename.split(".")[-1] or "").lower()
-    kind = ext if ext in ("docx", "pdf", "txt") else "archivo"
+    # Admisión previa: formato real, tamaño y páginas antes del parseo pesado
+    pre = preflight(file_bytes, filename)
+    for w in pre.warnings:
+        st.warning(w.message)
+    if not pre.ok:
+        for issue in pre.issues:
+            st.error(issue.message)
+        with st.expander("🔧 Debug: Admisión del archivo", expanded=False):
+            st.json(pre.as_dict())
+        st.stop()
+
+    # El parser espera (bytes, filename) y usa el formato detectado por preflight
+    kind = pre.kind
+    text = extract_text(file_bytes, filename, kind=kind)
 
     st.success(f"Archivo leído como **{kind.upper()}** – longitud: {len(text)} caracteres")
 
@@ -0,0 +1,214 @@
+# test_preflight.py
+# Chequeos de la etapa de admisión con PDFs y ZIPs armados en memoria.
+import io, struct, time, zipfile, zlib
+
+import pytest
+
+import preflight as pf
+from parsers import extract_text
+from preflight import PreflightLimits, preflight
+
+# ---------------------------------------------------------------------
+# Fábricas de archivos mínimos
+# ---------------------------------------------------------------------
+def make_objstm(objects: dict) -> bytes:
+    """Object stream comprimido con su encabezado de pares (número, offset)."""
+    header, body = [], b""
+    for num, obj in objects.items():
+        header.append(b"%d %d" % (num, len(body)))
+        body += obj + b" "
+    header = b" ".join(header) + b" "
+    packed = zlib.compress(header + body)
+    return (b"5 0 obj<</Type/ObjStm/N %d/First %d/Filter/FlateDecode>>stream\n" % (len(objects), len(header))
+            + packed + b"\nendstream endobj\n")
+
+def make_pdf(pages: int = 1, font: bool = True, encrypt: bool = False, objstm: bool = False) -> bytes:
+    page = b"<</Type/Page/Resources<</Font<</F1 9 0 R>>>>>>" if font else b"<</Type/Page/Resources<</XObject<</Im1 9 0 R>>>>>>"
+    pages_dict = b"<</Type /Pages /Kids[3 0 R] /Count %d>>" % pages
+    trailer = b"trailer<</Root 1 0 R/Encrypt 8 0 R>>" if encrypt else b"trailer<</Root 1 0 R>>"
+    body = b"%PDF-1.7\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n"
+    if objstm:
+        body += make_objstm({2: pages_dict, 3: page})
+    else:
+        body += b"2 0 obj" + pages_dict + b"endobj\n3 0 obj" + page + b"endobj\n"
+    return body + trailer + b"\n%%EOF"
+
+def make_zip(members: dict) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        for name, content in members.items():
+            zf.writestr(name, content)
+    return buf.getvalue()
+
+def content_types(part: str, ctype: str) -> str:
+    return (
+        '<?xml version="1.0"?><Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        f'<Override PartName="/{part}" ContentType="{ctype}"/></Types>'
+    )
+
+WORD_MAIN = "application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"
+EXCEL_MAIN = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"
+
+def make_docx(part: str = "word/document.xml") -> bytes:
+    return make_zip({"[Content_Types].xml": content_types(part, WORD_MAIN), part: "<w:document/>"})
+
+def codes(items):
+    return [i.code for i in items]
+
+# ---------------------------------------------------------------------
+# PDF
+# ---------------------------------------------------------------------
+def test_pdf_with_text_is_admitted():
+    res = preflight(make_pdf(pages=3), "cv.pdf")
+    assert res.ok and res.kind == "pdf"
+    assert res.pages == 3 and res.has_text_layer is True
+    assert res.warnings == []
+
+def test_scanned_pdf_is_rejected():
+    res = preflight(make_pdf(font=False), "cv.pdf")
+    assert codes(res.issues) == ["pdf_sin_texto"]
+    assert res.kind is None
+
+def test_objstm_only_pdf_is_inspected():
+    res = preflight(make_pdf(pages=7, objstm=True), "cv.pdf")
+    assert res.ok and res.pages == 7 and res.has_text_layer is True
+
+def test_objstm_budget_exhausted_is_only_a_warning():
+    res = preflight(make_pdf(font=False, objstm=True), "cv.pdf", PreflightLimits(max_pdf_objstm_bytes=10))
+    assert res.ok
+    assert "pdf_texto_incierto" in codes(res.warnings)
+
+def test_objstm_zero_budget_inflates_nothing():
+    res = preflight(make_pdf(objstm=True), "cv.pdf", PreflightLimits(max_pdf_objstm_bytes=0))
+    assert res.ok and res.pages is None and res.has_text_layer is None
+    assert "pdf_texto_incierto" in codes(res.warnings)
+
+def test_page_budget_warns_by_default_and_rejects_when_set():
+    res = preflight(make_pdf(pages=500), "cv.pdf")
+    assert res.ok and codes(res.warnings) == ["muchas_paginas"]
+    res = preflight(make_pdf(pages=500), "cv.pdf", PreflightLimits(max_pages=100))
+    assert codes(res.issues) == ["demasiadas_paginas"]
+
+def test_outlines_count_is_not_taken_as_pages():
+    data = make_pdf(pages=2).replace(b"%%EOF", b"7 0 obj<</Type/Outlines/Count 900>>endobj\n%%EOF")
+    assert preflight(data, "cv.pdf").pages == 2
+
+def test_objstm_outline_item_count_is_not_taken_as_pages():
+    pages_dict = b"<</Type /Pages /Kids[3 0 R] /Count 2>>"
+    outline_item = b"<</Title(Publicaciones)/Parent 6 0 R/First 8 0 R/Last 9 0 R/Count 450>>"
+    page = b"<</Type/Page/Resources<</Font<</F1 9 0 R>>>>>>"
+    data = (b"%PDF-1.7\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n"
+            + make_objstm({2: pages_dict, 7: outline_item, 3: page})
+            + b"trailer<</Root 1 0 R>>\n%%EOF")
+    res = preflight(data, "cv.pdf", PreflightLimits(max_pages=100))
+    assert res.ok and res.pages == 2
+
+@pytest.mark.parametrize("opens, expected", [
+    (True, "pdf_restringido"),
+    (None, "pdf_cifrado_incierto"),
+])
+def test_encrypted_pdf_readable_with_empty_password_is_admitted(monkeypatch, opens, expected):
+    monkeypatch.setattr(pf, "_pdf_opens_without_password", lambda data: opens)
+    res = preflight(make_pdf(encrypt=True), "cv.pdf")
+    assert res.ok and expected in codes(res.warnings)
+
+def test_encrypted_pdf_with_user_password_is_rejected(monkeypatch):
+    monkeypatch.setattr(pf, "_pdf_opens_without_password", lambda data: False)
+    res = preflight(make_pdf(encrypt=True), "cv.pdf")
+    assert codes(res.issues) == ["pdf_cifrado"]
+
+def _best_time(data: bytes, runs: int = 3) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        preflight(data, "cv.pdf")
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+@pytest.mark.parametrize("build", [
+    lambda n: b"/Type /Pages " * n,
+    lambda n: b"/Count 1 " * n,
+    lambda n: b"/Type /Pages /Count 1 " * n,
+    lambda n: (b"/Type /Pages " + b"/Count 1 " * 900) * (n // 1000 + 1),
+    lambda n: b"/Type/ObjStm " * n + b"stream\n",
+    lambda n: b"/Encrypt" + b" " * (10 * n),
+])
+def test_adversarial_pdf_scales_linearly(build):
+    # 4x más datos: lineal ~4x, cuadrático ~16x
+    small = _best_time(b"%PDF-1.4\n" + build(20_000))
+    big = _best_time(b"%PDF-1.4\n" + build(80_000))
+    assert big < 8 * small + 0.05
+
+# ---------------------------------------------------------------------
+# ZIP / Word / otros
+# ---------------------------------------------------------------------
+def test_docx_is_admitted():
+    res = preflight(make_docx(), "cv.docx")
+    assert res.ok and res.kind == "docx"
+
+def test_docx_with_renamed_main_part_is_admitted():
+    res = preflight(make_docx("word/document2.xml"), "cv.docx")
+    assert res.ok and res.kind == "docx"
+
+def test_docx_main_part_found_through_rels():
+    rels = (
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="word/document2.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+        '</Relationships>'
+    )
+    res = preflight(make_zip({"_rels/.rels": rels, "word/document2.xml": "<w:document/>"}), "cv.docx")
+    assert res.ok and res.kind == "docx"
+
+def test_spreadsheet_zip_is_rejected():
+    data = make_zip({"[Content_Types].xml": content_types("xl/workbook.xml", EXCEL_MAIN), "xl/workbook.xml": "<x/>"})
+    res = preflight(data, "cv.docx")
+    assert codes(res.issues) == ["formato_no_soportado"]
+    assert "Excel" in res.issues[0].message
+
+def test_plain_zip_is_rejected():
+    assert codes(preflight(make_zip({"a.txt": "hola"}), "cv.docx").issues) == ["formato_no_soportado"]
+
+def test_broken_zip_is_rejected():
+    assert codes(preflight(b"PK\x03\x04" + b"\x00" * 64, "cv.docx").issues) == ["zip_danado"]
+
+def test_zip_with_corrupt_central_directory_offset_is_rejected():
+    data = bytearray(make_docx())
+    eocd = data.rfind(b"PK\x05\x06")
+    data[eocd + 16:eocd + 20] = struct.pack("<I", 5)
+    assert codes(preflight(bytes(data), "cv.docx").issues) == ["zip_danado"]
+
+def test_zip_with_unsupported_version_is_rejected():
+    data = bytearray(make_docx())
+    data[data.find(b"PK\x01\x02") + 6] = 229   # "version needed to extract" 22.9
+    assert codes(preflight(bytes(data), "cv.docx").issues) == ["zip_danado"]
+
+def test_unzipped_budget():
+    res = preflight(make_docx(), "cv.docx", PreflightLimits(max_unzipped_bytes=10))
+    assert codes(res.issues) == ["docx_demasiado_grande"]
+
+def test_ole2_files_are_rejected():
+    ole2 = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1" + b"\x00" * 512
+    assert codes(preflight(ole2, "cv.doc").issues) == ["doc_legacy"]
+    encrypted = ole2 + "EncryptionInfo".encode("utf-16-le")
+    assert codes(preflight(encrypted, "cv.docx").issues) == ["docx_cifrado"]
+
+def test_size_and_content_rejections():
+    assert codes(preflight(b"", "cv.txt").issues) == ["vacio"]
+    assert codes(preflight(b"x" * 50, "cv.txt", PreflightLimits(max_bytes=40)).issues) == ["demasiado_grande"]
+    assert codes(preflight(b"\x89PNG\r\n\x1a\n\x00\x00", "cv.txt").issues) == ["formato_desconocido"]
+
+def test_mislabeled_file_is_routed_by_content():
+    res = preflight(make_docx(), "cv.pdf")
+    assert res.ok and res.kind == "docx"
+    assert codes(res.warnings) == ["extension_incorrecta"]
+    assert res.as_dict()["avisos"][0]["code"] == "extension_incorrecta"
+
+# ---------------------------------------------------------------------
+# Ruteo en extract_text
+# ---------------------------------------------------------------------
+def test_extract_text_uses_kind_over_extension():
+    assert extract_text(b"Formacion academica", "cv.pdf", kind="txt") == "Formacion academica"
+
+def test_extract_text_falls_back_to_extension():
+    assert extract_text(b"hola", "cv.txt") == "hola"